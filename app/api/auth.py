@@ -2,9 +2,19 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from pydantic import BaseModel
 
-from ..auth import authenticate_user, create_access_token
+from ..auth import (
+    REFRESH_TOKEN,
+    UserDep,
+    authenticate_user,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    get_user,
+    revoke_user_tokens,
+)
 from ..database import SessionDep
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -13,6 +23,11 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 @router.post("/login")
@@ -27,5 +42,28 @@ def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
-    return Token(access_token=access_token, token_type="bearer")
+    return Token(access_token=create_access_token(user), token_type="bearer",
+                 refresh_token=create_refresh_token(user))
+
+
+@router.post("/refresh")
+def refresh_access_token(refresh_request: RefreshRequest, session: SessionDep) -> Token:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        claims = decode_token(refresh_request.refresh_token, REFRESH_TOKEN)
+    except JWTError as e:
+        raise credentials_exception from e
+    user = get_user(claims.username, session)
+    if user is None or user.token_version != claims.token_version:
+        raise credentials_exception
+    return Token(access_token=create_access_token(user), token_type="bearer",
+                 refresh_token=create_refresh_token(user))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(session: SessionDep, current_user: UserDep):
+    revoke_user_tokens(current_user, session)
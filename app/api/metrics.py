@@ -0,0 +1,37 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ..auth import UserDep
+from ..metrics import PROFILER, REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/api/profiler", response_class=PlainTextResponse)
+def get_profile(current_user: UserDep):
+    return PlainTextResponse(PROFILER.collapsed())
+
+
+@router.post("/api/profiler", status_code=status.HTTP_204_NO_CONTENT)
+def start_profiler(
+    current_user: UserDep,
+    interval: Annotated[float, Query(gt=0, le=1, description="Seconds between stack samples")] = 0.01,
+    reset: Annotated[bool, Query(description="Discard previously collected samples")] = True,
+):
+    if reset:
+        PROFILER.reset()
+    PROFILER.start(interval)
+
+
+@router.delete("/api/profiler", status_code=status.HTTP_204_NO_CONTENT)
+def stop_profiler(current_user: UserDep):
+    PROFILER.stop()
@@ -1,5 +1,8 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Annotated
+from typing import Annotated, Any, NamedTuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -8,6 +11,7 @@ from passlib.context import CryptContext
 from sqlmodel import Session, select
 
 from .database import SessionDep
+from .metrics import CACHE_REQUESTS
 from .models import User
 from .settings import settings
 
@@ -15,10 +19,63 @@ SECRET_KEY = settings.secret_key
 
 ALGORITHM = "HS256"
 
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds or at an explicit deadline."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                return item[1]
+            if item is not None:
+                del self._data[key]
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        return None
+
+    def set(self, key, value, expires_in: float | None = None):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        ttl = self.ttl if expires_in is None else min(self.ttl, expires_in)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class TokenClaims(NamedTuple):
+    username: str
+    token_version: int
+    expires_at: float
+
+
+token_cache = TTLCache("auth_token", settings.auth_cache_size, settings.auth_cache_ttl)
+user_cache = TTLCache("auth_user", settings.auth_cache_size, settings.auth_cache_ttl)
+# username -> lowest token_version a cached user may have, raised on every revocation in this process.
+_min_token_versions: dict[str, int] = {}
+
+
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
@@ -35,13 +92,55 @@ def authenticate_user(username: str, password: str, session: Session):
     return user
 
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+def _create_token(user: User, token_type: str, expires_delta: timedelta) -> str:
+    expire = datetime.now(timezone.utc) + expires_delta
+    to_encode = {"sub": user.username, "ver": user.token_version, "type": token_type, "exp": expire}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def create_access_token(user: User) -> str:
+    return _create_token(user, ACCESS_TOKEN, timedelta(minutes=settings.access_token_expire_minutes))
+
+
+def create_refresh_token(user: User) -> str:
+    return _create_token(user, REFRESH_TOKEN, timedelta(days=settings.refresh_token_expire_days))
+
+
+def decode_token(token: str, token_type: str) -> TokenClaims:
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    username = payload.get("sub")
+    if username is None or payload.get("type", ACCESS_TOKEN) != token_type:
+        raise JWTError("Invalid token claims")
+    return TokenClaims(username, payload.get("ver", 0), payload["exp"])
+
+
+def get_user(username: str, session: Session) -> User | None:
+    min_version = _min_token_versions.get(username, 0)
+    user = user_cache.get(username)
+    if user is None or user.token_version < min_version:
+        user = session.exec(select(User).where(User.username == username)).first()
+        # A row read before a concurrent revocation committed must not be cached over the new version.
+        if user is not None and user.token_version >= min_version:
+            session.expunge(user)
+            user_cache.set(username, user)
+    return user
+
+
+def revoke_user_tokens(user: User, session: Session):
+    """Invalidate every access and refresh token issued to ``user`` so far.
+
+    This is the only way refresh tokens are revoked; refreshing does not invalidate the token it used.
+    """
+    db_user = session.get(User, user.id)
+    if db_user is None:
+        return
+    db_user.token_version += 1
+    session.add(db_user)
+    session.commit()
+    _min_token_versions[db_user.username] = db_user.token_version
+    user_cache.pop(db_user.username)
+
+
 def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     session: SessionDep
@@ -51,16 +150,15 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError as e:
-        raise credentials_exception from e
-    statement = select(User).where(User.username == username)
-    user = session.exec(statement).first()
-    if user is None:
+    claims = token_cache.get(token)
+    if claims is None or claims.expires_at <= time.time():
+        try:
+            claims = decode_token(token, ACCESS_TOKEN)
+        except JWTError as e:
+            raise credentials_exception from e
+        token_cache.set(token, claims, expires_in=claims.expires_at - time.time())
+    user = get_user(claims.username, session)
+    if user is None or user.token_version != claims.token_version:
         raise credentials_exception
     return user
 
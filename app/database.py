@@ -1,6 +1,7 @@
 from typing import Annotated
 
 from fastapi import Depends
+from sqlalchemy import inspect, text
 from sqlmodel import Session, SQLModel, create_engine
 
 from .settings import settings
@@ -12,6 +13,17 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread
 SQLModel.metadata.create_all(bind=engine)
 
 
+def upgrade_schema():
+    """Add columns introduced after a database was created, since create_all never alters tables."""
+    inspector = inspect(engine)
+    if not inspector.has_table("user"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("user")}
+    if "token_version" not in columns:
+        with engine.begin() as connection:
+            connection.execute(text('ALTER TABLE "user" ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0'))
+
+
 def get_session():
     with Session(engine) as session:
         yield session
@@ -1,23 +1,48 @@
 import asyncio
+import logging
 import queue
 import socket
 import threading
+import time
 from datetime import datetime, timezone
 
-from dnslib import QTYPE, RR, A
-from dnslib.server import BaseResolver, DNSLogger, DNSRecord, DNSServer
+from dnslib import RCODE
+from dnslib.label import DNSBuffer
+from dnslib.server import BaseResolver, DNSHandler, DNSLogger, DNSRecord, DNSServer
 from sqlmodel import Session, select
 from .settings import settings
 
 from .database import engine
 from .llm_filter import is_domain_safe
+from .metrics import (
+    CACHE_REQUESTS,
+    DNS_QUERIES,
+    DNS_STAGE_LATENCY,
+    DNS_UPSTREAM_ERRORS,
+    REVIEW_ERRORS,
+    REVIEW_LATENCY,
+    REVIEW_QUEUE_DEPTH,
+)
 from .models import DomainList, DomainLog, DomainStatus, ListType
+from .sinkhole import Question, Sinkhole, parse_question, servfail_reply
+
+logger = logging.getLogger(__name__)
 
 
 class FilteringResolver(BaseResolver):
     def __init__(self):
         super().__init__()
         self.domain_llm_queue = queue.Queue()
+        REVIEW_QUEUE_DEPTH.set_function(self.domain_llm_queue.qsize)
+
+        self.sinkhole = Sinkhole(
+            settings.clam_url,
+            ipv4=settings.sinkhole_ipv4,
+            ipv6=settings.sinkhole_ipv6,
+            ttl=settings.sinkhole_ttl,
+            refresh_interval=settings.sinkhole_refresh_interval,
+        )
+        self.sinkhole.start()
 
         self.llm_thread = threading.Thread(
             target=lambda: asyncio.run(self._process_queue()), daemon=True)
@@ -29,53 +54,131 @@ class FilteringResolver(BaseResolver):
             domain = await loop.run_in_executor(None, self.domain_llm_queue.get)
             if domain is None:
                 break
+            start = time.perf_counter()
             try:
                 await is_domain_safe(domain)
+            except Exception:
+                REVIEW_ERRORS.inc()
+                logger.exception("Review of %s failed", domain)
             finally:
+                REVIEW_LATENCY.observe(time.perf_counter() - start)
                 self.domain_llm_queue.task_done()
 
+    def stop(self):
+        """Drop pending reviews, wait for the one in progress to finish and stop background threads."""
+        while True:
+            try:
+                self.domain_llm_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.domain_llm_queue.task_done()
+        self.domain_llm_queue.put(None)
+        self.llm_thread.join()
+        self.sinkhole.stop()
+
     def resolve(self, request, handler):
-        qname = str(request.q.qname)
+        with DNS_STAGE_LATENCY.time(stage="total"):
+            qname = str(request.q.qname)
+            if self._classify(qname) == DomainStatus.blocked:
+                with DNS_STAGE_LATENCY.time(stage="block_reply"):
+                    buffer = DNSBuffer()
+                    request.q.pack(buffer)
+                    question = Question(request.header.id, request.header.bitmap, qname,
+                                        request.q.qtype, bytes(buffer.data))
+                    return DNSRecord.parse(self.sinkhole.reply(question))
+            data = self._forward(request.pack())
+            if data is None:
+                reply = request.reply()
+                reply.header.rcode = RCODE.SERVFAIL
+                return reply
+            return DNSRecord.parse(data)
+
+    def resolve_packet(self, data: bytes) -> bytes | None:
+        """Answer a raw query without building dnslib objects.
+
+        Returns ``None`` if the query needs the full dnslib parser.
+        """
+        question = parse_question(data)
+        if question is None:
+            return None
+        with DNS_STAGE_LATENCY.time(stage="total"):
+            if self._classify(question.qname) == DomainStatus.blocked:
+                with DNS_STAGE_LATENCY.time(stage="block_reply"):
+                    return self.sinkhole.reply(question)
+            reply = self._forward(data)
+            return servfail_reply(question) if reply is None else reply
+
+    def _classify(self, qname: str) -> DomainStatus:
         with Session(engine) as session:
-            print(f"Resolving {qname}")
+            logger.info("Resolving %s", qname, extra={"event": "resolve"})
 
-            entries = session.exec(select(DomainList).where(DomainList.domain == qname)).all()
+            with DNS_STAGE_LATENCY.time(stage="lookup"):
+                entries = session.exec(select(DomainList).where(DomainList.domain == qname)).all()
 
             status = DomainStatus.reviewed
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
             for entry in entries:
-                if entry.expires_at is None or entry.expires_at > datetime.now(timezone.utc).replace(tzinfo=None):
+                if entry.expires_at is None or entry.expires_at > now:
                     if entry.list_type == ListType.blacklist:
-                        print(f"Domain {qname} is expired and blacklisted")
+                        logger.debug("Domain %s is blacklisted", qname, extra={"event": "list_match"})
                         status = DomainStatus.blocked
                     elif entry.list_type == ListType.whitelist:
-                        print(f"Domain {qname} is expired and whitelisted")
+                        logger.debug("Domain %s is whitelisted", qname, extra={"event": "list_match"})
                         status = DomainStatus.allowed
 
             if status == DomainStatus.reviewed:
-                print(f"Domain {qname} not found in DB, checking lists...")
+                CACHE_REQUESTS.inc(cache="domain_list", result="miss")
+                logger.info("Domain %s not found in DB, queued for review", qname,
+                            extra={"event": "review_enqueue"})
                 self.domain_llm_queue.put(qname)
+            else:
+                CACHE_REQUESTS.inc(cache="domain_list", result="hit")
+
+            with DNS_STAGE_LATENCY.time(stage="log_commit"):
+                log = DomainLog(domain=qname, status=status)
+                session.add(log)
+                session.commit()
+        DNS_QUERIES.inc(status=status.value)
+        if status == DomainStatus.blocked:
+            logger.info("Blocking domain %s", qname, extra={"event": "block"})
+        return status
+
+    def _forward(self, data: bytes) -> bytes | None:
+        """Send a raw query upstream and return the raw answer, or ``None`` if the round trip failed."""
+        with DNS_STAGE_LATENCY.time(stage="upstream"):
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                    sock.settimeout(settings.dns_upstream_timeout)
+                    sock.sendto(data, (settings.dns_upstream_ip, settings.dns_upstream_port))
+                    data, _ = sock.recvfrom(4096)
+            except OSError as e:
+                DNS_UPSTREAM_ERRORS.inc(error=type(e).__name__)
+                logger.warning("Upstream %s:%s failed: %r",
+                               settings.dns_upstream_ip, settings.dns_upstream_port, e,
+                               extra={"event": "upstream_error"})
+                return None
+        return data
+
 
-            log = DomainLog(domain=qname, status=status)
-            session.add(log)
-            session.commit()
+class FilteringHandler(DNSHandler):
+    """Tries the resolver's wire-format path before falling back to dnslib's parse/resolve/pack cycle.
 
-        if status == DomainStatus.blocked.value:
-            name = str(settings.clam_url).rstrip('.')
-            print(f"Blocking domain {qname}")
-            print(f"Return web {name} : {socket.gethostbyname(name)}")
-            reply = request.reply()
-            reply.add_answer(RR(qname, QTYPE.A, rdata=A(socket.gethostbyname(name)), ttl=60))
-            return reply
+    Queries answered on the wire path skip dnslib's request and reply logging.
+    """
 
-        upstream_ip = "8.8.8.8"
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.sendto(request.pack(), (upstream_ip, 53))
-        data, _ = sock.recvfrom(4096)
-        return DNSRecord.parse(data)
+    def get_reply(self, data):
+        reply = self.server.resolver.resolve_packet(data)
+        if reply is None:
+            return super().get_reply(data)
+        return reply
 
 
 def start_dns_proxy(ip="127.0.0.1", port=5353):
     resolver = FilteringResolver()
-    logger = DNSLogger(prefix=False)
-    server = DNSServer(resolver, port=port, address=ip, logger=logger)
+    server_logger = logging.getLogger(f"{__name__}.server")
+    dns_logger = DNSLogger(log=settings.dns_log_events, prefix=False,
+                           logf=lambda line: server_logger.info(line, extra={"event": "dnslib"}))
+    handler = FilteringHandler if settings.dns_wire_fast_path else DNSHandler
+    server = DNSServer(resolver, port=port, address=ip, logger=dns_logger, handler=handler)
     server.start_thread()
+    return server
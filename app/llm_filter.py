@@ -1,3 +1,5 @@
+import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import AsyncGenerator
 
@@ -15,12 +17,22 @@ from crawl4ai import (
 from sqlmodel import Session, select
 
 from .database import engine
+from .metrics import (
+    CACHE_REQUESTS,
+    FETCH_ERRORS,
+    FETCH_LATENCY,
+    MODERATION_ERRORS,
+    MODERATION_LATENCY,
+)
 from .models import DomainList, ListSource, ListType
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 async def fetch_site_text(domain: str, timeout: int = 5, max_bytes: int = 5000) -> str:
-    print(f"fetching '{domain}' text...")
+    logger.debug("Fetching '%s' text...", domain)
+    start = time.perf_counter()
     browser_config = BrowserConfig(
         browser_type="chromium",
         headless=True,
@@ -62,9 +74,11 @@ async def fetch_site_text(domain: str, timeout: int = 5, max_bytes: int = 5000)
                             texts.append(res.markdown)
                 if texts:
                     combined = "\n".join(texts)
+                    FETCH_LATENCY.observe(time.perf_counter() - start, backend="crawl4ai")
                     return combined[:max_bytes]
         except Exception as e:
-            print(f"Error fetching {url} with crawl4ai: {e}")
+            FETCH_ERRORS.inc(backend="crawl4ai")
+            logger.warning("Error fetching %s with crawl4ai: %s", url, e)
             continue
 
     # Fallback to aiohttp if crawl4ai fails
@@ -75,10 +89,13 @@ async def fetch_site_text(domain: str, timeout: int = 5, max_bytes: int = 5000)
                 async with session.get(url) as resp:
                     if resp.status == 200:
                         text = await resp.text()
+                        FETCH_LATENCY.observe(time.perf_counter() - start, backend="aiohttp")
                         return text[:max_bytes]
         except Exception as e:
-            print(f"Error fetching {url} with aiohttp: {e}")
+            FETCH_ERRORS.inc(backend="aiohttp")
+            logger.warning("Error fetching %s with aiohttp: %s", url, e)
             continue
+    FETCH_LATENCY.observe(time.perf_counter() - start, backend="none")
     return ""
 
 
@@ -86,17 +103,20 @@ async def moderate_text(text: str) -> bool:
     if not text:
         return False
     try:
-        response = await openai.AsyncOpenAI(api_key=settings.openai_api_key).moderations.create(
-            model="omni-moderation-latest",
-            input=text,
-        )
+        with MODERATION_LATENCY.time():
+            response = await openai.AsyncOpenAI(api_key=settings.openai_api_key).moderations.create(
+                model="omni-moderation-latest",
+                input=text,
+            )
         result = response.results[0]
         return result.flagged and result.categories.sexual
     except openai.OpenAIError as e:
-        print(f"OpenAI error: {e}")
+        MODERATION_ERRORS.inc(error="openai")
+        logger.error("OpenAI error: %s", e)
         return False
     except Exception as e:
-        print(f"unexpected error: {e}")
+        MODERATION_ERRORS.inc(error="unexpected")
+        logger.exception("Unexpected moderation error: %s", e)
         return False
 
 
@@ -106,17 +126,20 @@ async def is_domain_safe(domain: str) -> bool:
             select(DomainList).where(
                 DomainList.domain == domain,
                 DomainList.list_type == ListType.blacklist)).first():
+            CACHE_REQUESTS.inc(cache="review_list", result="hit")
             return False
         if session.exec(
             select(DomainList).where(
                 DomainList.domain == domain,
                 DomainList.list_type == ListType.whitelist)).first():
+            CACHE_REQUESTS.inc(cache="review_list", result="hit")
             return True
+        CACHE_REQUESTS.inc(cache="review_list", result="miss")
 
         content = await fetch_site_text(domain)
         harmful = await moderate_text(content)
 
-        print(f"Moderation result for {domain}: {harmful}")
+        logger.info("Moderation result for %s: %s", domain, harmful)
 
         list_type = ListType.blacklist if harmful else ListType.whitelist
         session.add(DomainList(
@@ -0,0 +1,131 @@
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+
+from .settings import settings
+
+_listener: logging.handlers.QueueListener | None = None
+_event_filter: "EventFilter | None" = None
+_flush_stop = threading.Event()
+
+_summary_logger = logging.getLogger(f"{__name__}.summary")
+
+
+class EventFilter(logging.Filter):
+    """Per-event level, sampling and rate limiting for records logged with ``extra={"event": ...}``.
+
+    Records without an event pass through untouched. Once an event exceeds ``rate_limit`` records in
+    ``rate_interval`` seconds the rest are dropped, and a summary of how many were suppressed is logged
+    when the window ends.
+    """
+
+    def __init__(self, event_levels: dict[str, int], sample_rates: dict[str, float],
+                 rate_limit: int, rate_interval: float):
+        super().__init__()
+        self.event_levels = event_levels
+        self.sample_rates = sample_rates
+        self.rate_limit = rate_limit
+        self.rate_interval = rate_interval
+        # event -> [window start, records passed, records suppressed, level of last suppressed record]
+        self._windows: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None:
+            return True
+        level = self.event_levels.get(event)
+        if level is not None and record.levelno < level:
+            return False
+        rate = self.sample_rates.get(event, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        if self.rate_limit <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(event)
+            if window is not None and now - window[0] < self.rate_interval:
+                if window[1] >= self.rate_limit:
+                    window[2] += 1
+                    window[3] = record.levelno
+                    return False
+                window[1] += 1
+                return True
+            self._windows[event] = [now, 1, 0, record.levelno]
+        if window is not None and window[2]:
+            self._report(event, window[2], window[3])
+        return True
+
+    def flush(self, force: bool = False):
+        """Report suppressed counts of finished windows, or of every window if ``force`` is set."""
+        now = time.monotonic()
+        with self._lock:
+            finished = [event for event, window in self._windows.items()
+                        if window[2] and (force or now - window[0] >= self.rate_interval)]
+            summaries = [(event, self._windows.pop(event)) for event in finished]
+        for event, window in summaries:
+            self._report(event, window[2], window[3])
+
+    def _report(self, event: str, suppressed: int, levelno: int):
+        _summary_logger.log(levelno, "Suppressed %d '%s' records in the previous %gs window",
+                            suppressed, event, self.rate_interval)
+
+
+class _PassthroughQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so formatting is left to the listener thread.
+        return record
+
+
+def _flush_loop(event_filter: EventFilter):
+    while not _flush_stop.wait(event_filter.rate_interval):
+        event_filter.flush()
+
+
+def setup_logging():
+    global _listener, _event_filter
+    if _listener is not None:
+        return
+    level_names = logging.getLevelNamesMapping()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _PassthroughQueueHandler(log_queue)
+    _event_filter = EventFilter(
+        event_levels={event: level_names[level.upper()]
+                      for event, level in settings.log_event_levels.items()},
+        sample_rates=settings.log_sample_rates,
+        rate_limit=settings.log_rate_limit,
+        rate_interval=settings.log_rate_interval,
+    )
+    handler.addFilter(_event_filter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.log_level.upper())
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    if _event_filter.rate_limit > 0:
+        _flush_stop.clear()
+        threading.Thread(target=_flush_loop, args=(_event_filter,), daemon=True).start()
+
+
+def shutdown_logging():
+    global _listener, _event_filter
+    if _listener is None:
+        return
+    _flush_stop.set()
+    if _event_filter is not None:
+        _event_filter.flush(force=True)
+        _event_filter = None
+    _listener.stop()
+    _listener = None
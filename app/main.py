@@ -1,3 +1,4 @@
+import logging
 from contextlib import asynccontextmanager
 
 import uvicorn
@@ -5,19 +6,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import SQLModel
 
-from .api import auth, domain_logs, lists
-from .database import engine
+from .api import auth, domain_logs, lists, metrics
+from .database import engine, upgrade_schema
 from .dns_proxy import start_dns_proxy
+from .log import setup_logging, shutdown_logging
+from .metrics import PROFILER
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging()
     dns_port = settings.dns_port
     dns_ip = settings.dns_ip
     start_dns_proxy(ip=dns_ip, port=dns_port)
-    print(f"DNS Proxy started at {dns_ip}:{dns_port}")
+    logger.info("DNS Proxy started at %s:%s", dns_ip, dns_port)
+    if settings.profiler_enabled:
+        PROFILER.start(settings.profiler_interval)
     yield
+    PROFILER.stop()
+    shutdown_logging()
 
 app = FastAPI(title="Firewall DNS API", lifespan=lifespan)
 
@@ -30,10 +40,12 @@ app.add_middleware(
 )
 
 SQLModel.metadata.create_all(bind=engine)
+upgrade_schema()
 
 app.include_router(auth.router)
 app.include_router(domain_logs.router)
 app.include_router(lists.router)
+app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
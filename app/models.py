@@ -32,6 +32,7 @@ class User(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     username: str = Field(index=True, unique=True, max_length=64)
     hashed_password: str = Field(max_length=128)
+    token_version: int = Field(default=0)
 
 
 class DomainList(SQLModel, table=True):
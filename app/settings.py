@@ -5,11 +5,31 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     dns_ip: str = "127.0.0.1"
     dns_port: int = 5353
+    dns_upstream_ip: str = "8.8.8.8"
+    dns_upstream_port: int = 53
+    dns_upstream_timeout: float = 5.0
     api_ip: str = "127.0.0.1"
     api_port: int = 8000
     secret_key: str = "placeholder_secret_key"
+    access_token_expire_minutes: int = 15
+    refresh_token_expire_days: int = 7
+    auth_cache_ttl: float = 30.0
+    auth_cache_size: int = 1024
     sqlalchemy_database_url: str = "sqlite:///./firewall.db"
     clam_url: str = "cool.ntu.edu.tw"
+    profiler_enabled: bool = False
+    profiler_interval: float = 0.01
+    log_level: str = "INFO"
+    log_event_levels: dict[str, str] = {}
+    log_sample_rates: dict[str, float] = {}
+    log_rate_limit: int = 20
+    log_rate_interval: float = 10.0
+    dns_log_events: str = "-request,-reply"
+    dns_wire_fast_path: bool = True
+    sinkhole_ipv4: list[str] = []
+    sinkhole_ipv6: list[str] = []
+    sinkhole_ttl: int = 60
+    sinkhole_refresh_interval: float = 300.0
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,155 @@
+import ipaddress
+import logging
+import socket
+import struct
+import threading
+from typing import NamedTuple
+
+from .metrics import CACHE_REQUESTS, SINKHOLE_REFRESH_ERRORS
+
+logger = logging.getLogger(__name__)
+
+QTYPE_A = 1
+QTYPE_AAAA = 28
+QCLASS_IN = 1
+
+_HEADER = struct.Struct(">HHHHHH")
+_QUESTION_TAIL = struct.Struct(">HH")
+# Answer name is a compression pointer back to the question name at offset 12.
+_ANSWER = struct.Struct(">HHHIH")
+_NAME_POINTER = 0xC00C
+
+_FLAG_QR = 0x8000
+_FLAG_AA = 0x0400
+_FLAG_RD = 0x0100
+_FLAG_RA = 0x0080
+_RCODE_SERVFAIL = 2
+_OPCODE_MASK = 0x7800
+_LABEL_CHARS = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_")
+
+
+class Question(NamedTuple):
+    query_id: int
+    flags: int
+    qname: str
+    qtype: int
+    # Raw question section, copied verbatim into the reply.
+    section: bytes
+
+
+def parse_question(data: bytes) -> Question | None:
+    """Read the single question of a standard query straight from the wire.
+
+    Returns ``None`` for anything unusual (responses, other opcodes, several questions, compressed or
+    escaped names) so the caller can fall back to the full dnslib parser.
+    """
+    if len(data) < _HEADER.size:
+        return None
+    query_id, flags, qdcount, _, _, _ = _HEADER.unpack_from(data)
+    if flags & (_FLAG_QR | _OPCODE_MASK) or qdcount != 1:
+        return None
+
+    labels: list[str] = []
+    offset = _HEADER.size
+    while True:
+        if offset >= len(data):
+            return None
+        length = data[offset]
+        offset += 1
+        if length == 0:
+            break
+        label = data[offset:offset + length]
+        if length > 63 or len(label) != length or not _LABEL_CHARS.issuperset(label):
+            return None
+        labels.append(label.decode("ascii"))
+        offset += length
+    if offset + _QUESTION_TAIL.size > len(data):
+        return None
+    qtype, _ = _QUESTION_TAIL.unpack_from(data, offset)
+    offset += _QUESTION_TAIL.size
+    qname = ".".join(labels) + "."
+    return Question(query_id, flags, qname, qtype, data[_HEADER.size:offset])
+
+
+def servfail_reply(question: Question) -> bytes:
+    """Build a SERVFAIL answer echoing the query's ID and question."""
+    flags = _FLAG_QR | _FLAG_RA | (question.flags & _FLAG_RD) | _RCODE_SERVFAIL
+    return _HEADER.pack(question.query_id, flags, 1, 0, 0, 0) + question.section
+
+
+class Sinkhole:
+    """Pre-packed answers pointing blocked names at the block page.
+
+    The block page address is resolved once at startup and then refreshed in the background, so
+    answering a blocked query never waits on the system resolver. A queries get the IPv4 targets and
+    AAAA queries the IPv6 targets; every other type (HTTPS, SVCB, MX, ...) gets an empty NOERROR answer
+    so clients fall back to the A record instead of reaching the real site.
+    """
+
+    def __init__(self, hostname: str, ipv4: list[str], ipv6: list[str], ttl: int = 60,
+                 refresh_interval: float = 300.0):
+        self.hostname = hostname.rstrip(".")
+        self.static_ipv4 = ipv4
+        self.static_ipv6 = ipv6
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        # qtype -> (answer count, packed answer records)
+        self._answers: dict[int, tuple[int, bytes]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self.refresh()
+        if self.refresh_interval > 0 and not (self.static_ipv4 or self.static_ipv6):
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def refresh(self):
+        if self.static_ipv4 or self.static_ipv6:
+            ipv4, ipv6 = self.static_ipv4, self.static_ipv6
+        else:
+            try:
+                ipv4 = self._lookup(socket.AF_INET)
+                ipv6 = self._lookup(socket.AF_INET6)
+            except OSError as e:
+                SINKHOLE_REFRESH_ERRORS.inc()
+                logger.warning("Could not resolve block page %s, keeping previous answers: %s",
+                               self.hostname, e)
+                return
+        self._answers = {
+            QTYPE_A: self._pack_answers(QTYPE_A, [ipaddress.IPv4Address(ip).packed for ip in ipv4]),
+            QTYPE_AAAA: self._pack_answers(QTYPE_AAAA, [ipaddress.IPv6Address(ip).packed for ip in ipv6]),
+        }
+        logger.info("Block page %s answers: A=%s AAAA=%s", self.hostname, ipv4, ipv6)
+
+    def _lookup(self, family: socket.AddressFamily) -> list[str]:
+        try:
+            infos = socket.getaddrinfo(self.hostname, None, family, socket.SOCK_DGRAM)
+        except socket.gaierror:
+            if family == socket.AF_INET6:
+                return []
+            raise
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def _pack_answers(self, qtype: int, addresses: list[bytes]) -> tuple[int, bytes]:
+        return len(addresses), b"".join(
+            _ANSWER.pack(_NAME_POINTER, qtype, QCLASS_IN, self.ttl, len(rdata)) + rdata
+            for rdata in addresses)
+
+    def reply(self, question: Question) -> bytes:
+        answers = self._answers.get(question.qtype)
+        if answers is None:
+            CACHE_REQUESTS.inc(cache="sinkhole", result="nodata")
+            count, records = 0, b""
+        else:
+            CACHE_REQUESTS.inc(cache="sinkhole", result="hit")
+            count, records = answers
+        flags = _FLAG_QR | _FLAG_AA | _FLAG_RA | (question.flags & _FLAG_RD)
+        return _HEADER.pack(question.query_id, flags, 1, count, 0, 0) + question.section + records
@@ -0,0 +1,358 @@
+"""Load test for the DNS proxy against a local stub upstream and a stubbed moderation backend.
+
+Runs entirely offline: upstream queries are answered by a canned UDP responder and domain reviews never
+crawl or call OpenAI. Results are written as JSON so runs can be compared with ``--compare``.
+
+    uv run bench_dns.py --queries 20000 --concurrency 8 --output bench_results/latest.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+KINDS = ("allowed", "blocked", "unknown", "repeated", "random_subdomain")
+DEFAULT_MIX = "allowed=40,blocked=20,unknown=10,repeated=20,random_subdomain=10"
+STUB_UPSTREAM_ANSWER = "192.0.2.1"
+SINKHOLE_ANSWER = "198.51.100.1"
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(
+                f"unknown query kind {kind!r}, expected one of {', '.join(KINDS)}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=10000, help="total number of queries to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of client threads")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"query kind weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--listed-domains", type=int, default=1000,
+                        help="domains seeded into each of the whitelist and blacklist")
+    parser.add_argument("--repeated-domains", type=int, default=50,
+                        help="size of the pool of unlisted names that are queried over and over")
+    parser.add_argument("--moderation-latency", type=float, default=0.05,
+                        help="seconds the stubbed fetch + moderation takes per reviewed domain")
+    parser.add_argument("--flagged-rate", type=float, default=0.1,
+                        help="fraction of reviewed domains the stubbed moderation flags")
+    parser.add_argument("--timeout", type=float, default=2.0, help="client timeout per query in seconds")
+    parser.add_argument("--seed", type=int, default=204)
+    parser.add_argument("--wire-fast-path", action=argparse.BooleanOptionalAction, default=True,
+                        help="use the wire-format fast path in the proxy's handler")
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="previous results JSON to compare against")
+    return parser.parse_args()
+
+
+def build_query(query_id: int, qname: str, qtype: int = 1) -> bytes:
+    header = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    labels = b"".join(bytes([len(label)]) + label.encode("ascii") for label in qname.rstrip(".").split("."))
+    return header + labels + b"\0" + struct.pack(">HH", qtype, 1)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StubUpstream:
+    """Answers every A query with ``STUB_UPSTREAM_ANSWER`` and everything else with an empty answer."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.queries = 0
+
+    def start(self):
+        # Imported lazily: app modules read their settings from the environment at import time.
+        from app.sinkhole import Sinkhole, parse_question
+
+        responder = Sinkhole("stub-upstream", ipv4=[STUB_UPSTREAM_ANSWER], ipv6=[], refresh_interval=0)
+        responder.start()
+
+        def serve():
+            while True:
+                try:
+                    data, address = self.sock.recvfrom(4096)
+                except OSError:
+                    return
+                question = parse_question(data)
+                if question is not None:
+                    self.queries += 1
+                    self.sock.sendto(responder.reply(question), address)
+
+        threading.Thread(target=serve, daemon=True).start()
+
+    def stop(self):
+        self.sock.close()
+
+
+def install_moderation_stub(latency: float, flagged_rate: float):
+    from app import llm_filter
+
+    async def fetch_site_text(domain: str, timeout: int = 5, max_bytes: int = 5000) -> str:
+        await asyncio.sleep(latency)
+        return f"stub content for {domain}"
+
+    async def moderate_text(text: str) -> bool:
+        return random.Random(text).random() < flagged_rate
+
+    llm_filter.fetch_site_text = fetch_site_text
+    llm_filter.moderate_text = moderate_text
+
+
+def seed_lists(count: int, rng: random.Random) -> tuple[list[str], list[str]]:
+    from sqlmodel import Session
+
+    from app.database import engine
+    from app.models import DomainList, ListSource, ListType
+
+    allowed = [f"allowed{i}-{rng.randrange(10**6)}.example." for i in range(count)]
+    blocked = [f"blocked{i}-{rng.randrange(10**6)}.example." for i in range(count)]
+    with Session(engine) as session:
+        session.add_all([DomainList(domain=d, list_type=ListType.whitelist, source=ListSource.manual)
+                         for d in allowed])
+        session.add_all([DomainList(domain=d, list_type=ListType.blacklist, source=ListSource.manual)
+                         for d in blocked])
+        session.commit()
+    return allowed, blocked
+
+
+def table_counts() -> dict[str, int]:
+    from sqlmodel import Session, func, select
+
+    from app.database import engine
+    from app.models import DomainList, DomainLog
+
+    with Session(engine) as session:
+        return {
+            "domain_log": session.exec(select(func.count()).select_from(DomainLog)).one(),
+            "domain_list": session.exec(select(func.count()).select_from(DomainList)).one(),
+        }
+
+
+def make_workload(args, allowed: list[str], blocked: list[str], rng: random.Random) -> list[tuple[str, str]]:
+    kinds = list(args.mix)
+    weights = [args.mix[kind] for kind in kinds]
+    repeated = [f"popular{i}.unlisted.example." for i in range(args.repeated_domains)]
+    listed = allowed + blocked
+    workload = []
+    for i, kind in enumerate(rng.choices(kinds, weights=weights, k=args.queries)):
+        if kind == "allowed":
+            qname = rng.choice(allowed)
+        elif kind == "blocked":
+            qname = rng.choice(blocked)
+        elif kind == "unknown":
+            qname = f"unknown{i}.unlisted.example."
+        elif kind == "repeated":
+            qname = rng.choice(repeated)
+        else:
+            qname = f"r{rng.getrandbits(40):x}.{rng.choice(listed)}"
+        workload.append((kind, qname))
+    return workload
+
+
+def run_clients(address: tuple[str, int], workload: list[tuple[str, str]], concurrency: int,
+                timeout: float) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    failures: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+
+    def client(offset: int):
+        local_latencies = defaultdict(list)
+        local_failures = defaultdict(int)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            for query_id, (kind, qname) in enumerate(workload[offset::concurrency]):
+                packet = build_query(query_id & 0xFFFF, qname)
+                start = time.perf_counter()
+                try:
+                    sock.sendto(packet, address)
+                    while True:
+                        data, _ = sock.recvfrom(4096)
+                        # Skip late answers to queries that already timed out.
+                        if struct.unpack_from(">H", data)[0] == query_id & 0xFFFF:
+                            break
+                except OSError:
+                    local_failures[kind] += 1
+                    continue
+                local_latencies[kind].append(time.perf_counter() - start)
+        with lock:
+            for kind, values in local_latencies.items():
+                latencies[kind].extend(values)
+            for kind, count in local_failures.items():
+                failures[kind] += count
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures, time.perf_counter() - start
+
+
+def summarize(latencies: dict[str, list[float]], failures: dict[str, int], elapsed: float) -> dict:
+    paths = {}
+    all_latencies = []
+    for kind in KINDS:
+        values = sorted(latencies.get(kind, []))
+        if not values and not failures.get(kind):
+            continue
+        all_latencies.extend(values)
+        paths[kind] = {
+            "queries": len(values),
+            "failures": failures.get(kind, 0),
+            "qps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "p999_ms": percentile(values, 0.999) * 1000,
+        }
+    all_latencies.sort()
+    paths["total"] = {
+        "queries": len(all_latencies),
+        "failures": sum(failures.values()),
+        "qps": len(all_latencies) / elapsed,
+        "p50_ms": percentile(all_latencies, 0.50) * 1000,
+        "p99_ms": percentile(all_latencies, 0.99) * 1000,
+        "p999_ms": percentile(all_latencies, 0.999) * 1000,
+    }
+    return paths
+
+
+def print_report(results: dict, baseline: dict | None):
+    print(f"{'path':<18}{'queries':>9}{'fail':>6}{'qps':>10}{'p50 ms':>9}{'p99 ms':>9}{'p999 ms':>9}")
+    for path, row in results["paths"].items():
+        line = (f"{path:<18}{row['queries']:>9}{row['failures']:>6}{row['qps']:>10.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['p999_ms']:>9.2f}")
+        old = baseline["paths"].get(path) if baseline else None
+        if old:
+            line += (f"   qps {_delta(row['qps'], old['qps'])}, p50 {_delta(row['p50_ms'], old['p50_ms'])}, "
+                     f"p99 {_delta(row['p99_ms'], old['p99_ms'])}")
+        print(line)
+    db = results["db"]
+    print(f"DomainLog writes: {db['domain_log_writes']} ({db['domain_log_writes_per_second']:.1f}/s), "
+          f"DomainList writes: {db['domain_list_writes']} ({db['domain_list_writes_per_second']:.1f}/s), "
+          f"reviews pending: {db['review_queue_pending']}")
+
+
+def _delta(new: float, old: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def run_benchmark(args, workdir: str) -> dict:
+    rng = random.Random(args.seed)
+    upstream = StubUpstream()
+    os.environ.update({
+        "SQLALCHEMY_DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "DNS_UPSTREAM_IP": "127.0.0.1",
+        "DNS_UPSTREAM_PORT": str(upstream.port),
+        "DNS_UPSTREAM_TIMEOUT": str(args.timeout),
+        "DNS_WIRE_FAST_PATH": str(args.wire_fast_path).lower(),
+        "SINKHOLE_IPV4": json.dumps([SINKHOLE_ANSWER]),
+        "SINKHOLE_IPV6": "[]",
+        "LOG_LEVEL": "WARNING",
+    })
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    from sqlmodel import SQLModel
+
+    from app.database import engine
+    from app.dns_proxy import start_dns_proxy
+    from app.settings import settings
+
+    try:
+        SQLModel.metadata.create_all(bind=engine)
+        upstream.start()
+        install_moderation_stub(args.moderation_latency, args.flagged_rate)
+        allowed, blocked = seed_lists(args.listed_domains, rng)
+        workload = make_workload(args, allowed, blocked, rng)
+
+        server = start_dns_proxy(ip="127.0.0.1", port=0)
+        resolver = server.server.resolver
+        try:
+            address = server.server.server_address
+            before = table_counts()
+            latencies, failures, elapsed = run_clients(address, workload, args.concurrency, args.timeout)
+            after = table_counts()
+            pending_reviews = resolver.domain_llm_queue.qsize()
+        finally:
+            server.stop()
+            # Stop the review consumer before the temporary database goes away underneath it.
+            resolver.stop()
+    finally:
+        upstream.stop()
+        engine.dispose()
+
+    log_writes = after["domain_log"] - before["domain_log"]
+    list_writes = after["domain_list"] - before["domain_list"]
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "wire_fast_path": settings.dns_wire_fast_path,
+            "args": {key: str(value) if isinstance(value, Path) else value
+                     for key, value in vars(args).items()},
+            "elapsed_seconds": elapsed,
+        },
+        "paths": summarize(latencies, failures, elapsed),
+        "db": {
+            "domain_log_writes": log_writes,
+            "domain_log_writes_per_second": log_writes / elapsed,
+            "domain_list_writes": list_writes,
+            "domain_list_writes_per_second": list_writes / elapsed,
+            "review_queue_pending": pending_reviews,
+            "upstream_queries": upstream.queries,
+        },
+    }
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="dns-bench-") as workdir:
+        results = run_benchmark(args, workdir)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(results, baseline)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
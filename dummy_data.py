@@ -1,61 +1,154 @@
+"""Generate a synthetic dataset for load testing the log search, pagination and stats endpoints.
+
+Domain popularity follows a Zipf distribution and query times follow a daily traffic curve. Rows are
+written with bulk inserts in chunked transactions, so millions of logs can be generated in one run:
+
+    uv run dummy_data.py --logs 5000000 --lists 200000 --seed 204
+"""
+import argparse
+import itertools
 import random
-from datetime import datetime, timedelta
-from sqlmodel import Session, select
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, SQLModel, insert, select
+
 from app.database import engine
-from app.models import DomainLog, DomainList, ListType, ListSource
-
-def random_domain():
-    return f"example{random.randint(1, 10000)}.com"
-
-def random_ip():
-    return ".".join(str(random.randint(0, 255)) for _ in range(4))
-
-def create_dummy_logs(session, count=500):
-    logs = []
-    for i in range(count):
-        log = DomainLog(
-            domain=random_domain(),
-            ip=random_ip(),
-            timestamp=datetime.now() - timedelta(minutes=random.randint(0, 10000)),
-            status=random.choice(["allowed", "blocked"]),
-            list_type=random.choice([ListType.whitelist, ListType.blacklist])
-        )
-        logs.append(log)
-    session.add_all(logs)
-    session.commit()
-
-def create_dummy_lists(session, count=500):
-    lists = []
-    # Get existing domains from the database using ORM
-    existing_domains = set(row for row in session.exec(select(DomainList.domain)).all())
-    # Generate unique domains not already in the database
-    unique_domains = set()
-    while len(unique_domains) < count:
-        d = f"dummy{random.randint(1, 100000)}.com"
-        if d not in existing_domains:
-            unique_domains.add(d)
-    unique_domains = list(unique_domains)
-    half = count // 2
-    for i, domain in enumerate(unique_domains):
-        if i < half:
-            lists.append(DomainList(
-                domain=domain,
-                list_type=ListType.whitelist,
-                source=ListSource.manual
-            ))
-        else:
-            lists.append(DomainList(
-                domain=domain,
-                list_type=ListType.blacklist,
-                source=ListSource.manual
-            ))
-    session.add_all(lists)
-    session.commit()
+from app.models import DomainList, DomainLog, DomainStatus, ListSource, ListType
 
-def main():
+TLDS = ("com", "net", "org", "io", "tw", "edu.tw", "com.tw", "dev", "co", "info")
+WORDS = ("cloud", "news", "shop", "play", "video", "mail", "cdn", "photo", "game", "learn", "blog", "data",
+         "music", "live", "chat", "book", "food", "travel", "sport", "tech")
+# Relative traffic per hour of day, quiet overnight and peaking in the evening.
+HOURLY_WEIGHTS = (3, 2, 1, 1, 1, 2, 4, 6, 8, 9, 9, 10, 10, 10, 9, 9, 10, 11, 13, 15, 16, 14, 10, 6)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=100_000, help="number of DomainLog rows to generate")
+    parser.add_argument("--lists", type=int, default=10_000, help="number of DomainList rows to generate")
+    parser.add_argument("--domains", type=int, default=100_000, help="size of the domain universe")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of domain popularity")
+    parser.add_argument("--days", type=int, default=30, help="spread log timestamps over this many days")
+    parser.add_argument("--blacklist-ratio", type=float, default=0.3,
+                        help="fraction of list entries that are blacklisted")
+    parser.add_argument("--llm-ratio", type=float, default=0.7,
+                        help="fraction of list entries sourced from the LLM")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per insert transaction")
+    parser.add_argument("--seed", type=int, default=204)
+    args = parser.parse_args()
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+    return args
+
+
+def make_domains(count: int, rng: random.Random) -> list[str]:
+    """Return ``count`` distinct domain names, most popular first."""
+    return [f"{rng.choice(WORDS)}{rng.choice(WORDS)}{rank}.{rng.choice(TLDS)}." for rank in range(count)]
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def random_timestamps(count: int, days: int, now: datetime, rng: random.Random) -> list[datetime]:
+    """Draw ``count`` timestamps from the last ``days`` days, ending at ``now``."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Today has only run up to now: its current hour is partly elapsed and later hours have no traffic yet.
+    elapsed_in_hour = max((now - today).total_seconds() - now.hour * 3600, 1e-6)
+    today_weights = list(HOURLY_WEIGHTS[:now.hour]) + [HOURLY_WEIGHTS[now.hour] * elapsed_in_hour / 3600]
+    day_weights = [sum(today_weights)] + [sum(HOURLY_WEIGHTS)] * (days - 1)
+
+    day_offsets = rng.choices(range(days), weights=day_weights, k=count)
+    hours = rng.choices(range(24), weights=HOURLY_WEIGHTS, k=count)
+    timestamps = []
+    for day, hour in zip(day_offsets, hours):
+        span = 3600
+        if day == 0:
+            hour = rng.choices(range(now.hour + 1), weights=today_weights)[0]
+            if hour == now.hour:
+                span = elapsed_in_hour
+        timestamp = today - timedelta(days=day) + timedelta(hours=hour, seconds=rng.random() * span)
+        # Only microsecond rounding can push a draw in the current hour past now.
+        timestamps.append(min(timestamp, now))
+    return timestamps
+
+
+def bulk_insert(table, rows, total: int, chunk_size: int, label: str):
+    started = time.perf_counter()
+    written = 0
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        with Session(engine) as session:
+            session.execute(insert(table), chunk)
+            session.commit()
+        written += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"{label}: {written}/{total} rows ({written / elapsed:.0f} rows/s)")
+
+
+def create_dummy_lists(domains: list[str], args, rng: random.Random) -> dict[str, ListType]:
     with Session(engine) as session:
-        create_dummy_logs(session)
-        create_dummy_lists(session)
+        existing = set(session.exec(select(DomainList.domain)).all())
+
+    # Popular domains are the most likely to have been listed, so sample from the front of the universe.
+    listed = {}
+    extra = (f"list{i}-{rng.randrange(10**9)}.example." for i in itertools.count())
+    for domain in itertools.chain(domains, extra):
+        if len(listed) >= args.lists:
+            break
+        if domain in existing or domain in listed:
+            continue
+        listed[domain] = ListType.blacklist if rng.random() < args.blacklist_ratio else ListType.whitelist
+
+    now = datetime.now(timezone.utc)
+
+    def rows():
+        for domain, list_type in listed.items():
+            llm = rng.random() < args.llm_ratio
+            yield {
+                "domain": domain,
+                "list_type": list_type,
+                "source": ListSource.llm if llm else ListSource.manual,
+                "created_at": now - timedelta(seconds=rng.randrange(args.days * 86400 or 1)),
+                "expires_at": now + timedelta(seconds=rng.randrange(-3600, 86400)) if llm else None,
+            }
+
+    bulk_insert(DomainList, rows(), len(listed), args.chunk_size, "DomainList")
+    return listed
+
+
+def create_dummy_logs(domains: list[str], listed: dict[str, ListType], args, rng: random.Random):
+    cum_weights = zipf_cum_weights(len(domains), args.zipf)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    statuses = {ListType.blacklist: DomainStatus.blocked, ListType.whitelist: DomainStatus.allowed}
+
+    def rows():
+        remaining = args.logs
+        while remaining > 0:
+            size = min(args.chunk_size, remaining)
+            picked = rng.choices(domains, cum_weights=cum_weights, k=size)
+            for domain, timestamp in zip(picked, random_timestamps(size, args.days, now, rng)):
+                yield {
+                    "domain": domain,
+                    "status": statuses.get(listed.get(domain), DomainStatus.reviewed),
+                    "timestamp": timestamp,
+                }
+            remaining -= size
+
+    bulk_insert(DomainLog, rows(), args.logs, args.chunk_size, "DomainLog")
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    SQLModel.metadata.create_all(bind=engine)
+
+    domains = make_domains(args.domains, rng)
+    listed = create_dummy_lists(domains, args, rng)
+    create_dummy_logs(domains, listed, args, rng)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,11 +3,12 @@ from getpass import getpass
 from sqlmodel import Session, select
 
 from app.auth import get_password_hash
-from app.database import engine
+from app.database import engine, upgrade_schema
 from app.models import User
 
 
 def main():
+    upgrade_schema()
     with Session(engine) as session:
         username = input("Username: ")
         statement = select(User).where(User.username == username)